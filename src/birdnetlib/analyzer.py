@@ -1,5 +1,9 @@
-from multiprocessing.sharedctypes import Value
 import os
+import platform
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime
 
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
@@ -11,14 +15,12 @@ except:
     from tensorflow import lite as tflite
 
 import numpy as np
-import operator
 import requests
 from pathlib import Path
 import json
 
 from birdnetlib.species import SpeciesList
-from birdnetlib.utils import read_audio_segments
-from pprint import pprint
+from birdnetlib.utils import download_file, read_audio_segments
 
 # TODO: Update these values on every new model release.
 MODEL_VERSION = "2.4"  # This is the default model that is installed with the library.
@@ -34,12 +36,155 @@ LABEL_PATH = os.path.join(
 
 LOCATION_FILTER_THRESHOLD = 0.03
 
+MODEL_PRECISIONS = ("fp32", "fp16", "int8")
+
+# Interpreter threads per Analyzer. BirdNET's graph scales well up to ~4 threads.
+# When recordings are already analyzed in parallel processes, use num_threads=1.
+DEFAULT_NUM_THREADS = min(4, os.cpu_count() or 1)
+
+# Interpreter pools are built once per (model_path, num_threads) and shared by all
+# Analyzer instances in the process.
+_INTERPRETER_CACHE = {}
+_INTERPRETER_CACHE_LOCK = threading.Lock()
+
 
 class AnalyzerConfigurationError(Exception):
     pass
 
 
+@lru_cache(maxsize=None)
+def cpu_supports_fast_int8():
+    # INT8 kernels only outrun FP32 on CPUs with int8 dot-product instructions
+    # (VNNI on x86, dotprod on ARM). Without them, INT8 can be slower than FP32.
+    # The CPU doesn't change, so /proc/cpuinfo is only read once per process.
+    try:
+        with open("/proc/cpuinfo", "r") as cpuinfo:
+            flags = cpuinfo.read()
+    except OSError:
+        return False
+    if platform.machine() in ("aarch64", "armv7l", "arm64"):
+        return "asimddp" in flags
+    return "avx512_vnni" in flags or "avx_vnni" in flags
+
+
+class _InterpreterPool:
+    """Bounded pool of interpreters for one model file.
+
+    An interpreter can only run one inference at a time, so each caller checks one
+    out for the duration of resize/set/invoke/get. Interpreters are created on demand
+    up to max_size; further callers wait for one to be returned.
+    """
+
+    def __init__(self, model_path, num_threads, max_size):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.max_size = max(1, max_size)
+        self._idle = queue.Queue()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+        # Build the first interpreter eagerly; it also serves tensor details.
+        first = self._new_interpreter()
+        self._size = 1
+        self.interpreter = first["interpreter"]
+        self._idle.put(first)
+
+    def _new_interpreter(self):
+        # Loading from model_path lets TFLite memory-map the flatbuffer, so every
+        # interpreter of the same file (in this or another process) shares its
+        # pages instead of holding its own copy of the model in memory.
+        interpreter = tflite.Interpreter(
+            model_path=self.model_path, num_threads=self.num_threads
+        )
+        interpreter.allocate_tensors()
+
+        # Run a single inference on silence so the XNNPACK delegate packs its
+        # weights here, rather than during the first chunk of the first recording.
+        input_details = interpreter.get_input_details()[0]
+        interpreter.set_tensor(
+            input_details["index"],
+            np.zeros(input_details["shape"], dtype=input_details["dtype"]),
+        )
+        interpreter.invoke()
+
+        return {
+            "interpreter": interpreter,
+            "input_shape": tuple(int(i) for i in input_details["shape"]),
+        }
+
+    def _check_pid(self):
+        # A forked child inherits this pool (e.g. through an Analyzer created before
+        # the fork), but must not use the parent's interpreters, queue or lock.
+        # Start over with an empty pool in the child.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = queue.Queue()
+            self._lock = threading.Lock()
+            self._size = 0
+
+    @contextmanager
+    def acquire(self):
+        self._check_pid()
+        try:
+            state = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._size < self.max_size
+                if grow:
+                    self._size += 1
+            if grow:
+                try:
+                    state = self._new_interpreter()
+                except BaseException:
+                    # Give the slot back, or callers could wait forever on _idle.
+                    with self._lock:
+                        self._size -= 1
+                    raise
+            else:
+                state = self._idle.get()
+        try:
+            yield state
+        finally:
+            self._idle.put(state)
+
+
+def _load_interpreter(model_path, num_threads=DEFAULT_NUM_THREADS):
+    key = (model_path, num_threads)
+    with _INTERPRETER_CACHE_LOCK:
+        if key not in _INTERPRETER_CACHE:
+            # Running more interpreters than cores / num_threads only oversubscribes.
+            max_size = (os.cpu_count() or 1) // num_threads
+            _INTERPRETER_CACHE[key] = _InterpreterPool(
+                model_path, num_threads, max_size
+            )
+        return _INTERPRETER_CACHE[key]
+
+
+def _reset_interpreter_cache():
+    # A forked child must not reuse interpreters (or locks) from its parent.
+    # Pools already held by Analyzer instances reset themselves, see _check_pid.
+    global _INTERPRETER_CACHE_LOCK
+    _INTERPRETER_CACHE_LOCK = threading.Lock()
+    _INTERPRETER_CACHE.clear()
+
+
+# os.register_at_fork is not available on Windows, where there's no fork.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_interpreter_cache)
+
+
 class Detection:
+    # One instance per detection, so skip the per-instance __dict__.
+    __slots__ = (
+        "start_time",
+        "end_time",
+        "common_name",
+        "scientific_name",
+        "confidence",
+        "label",
+    )
+
     def __init__(self, start_time, end_time):
         self.start_time = start_time
         self.end_time = end_time
@@ -68,6 +213,9 @@ class Analyzer:
         classifier_model_path=None,
         classifier_labels_path=None,
         version=None,
+        batch_size=8,
+        precision=None,
+        num_threads=DEFAULT_NUM_THREADS,
     ):
         self.name = "Analyzer"
         self.model_name = "BirdNET-Analyzer"
@@ -76,29 +224,44 @@ class Analyzer:
         self.output_details = None
         self.input_layer_index = None
         self.output_layer_index = None
+        self.embedding_output_index = None
+        self._input_quantization = None
+        self._output_quantization = None
+        self._embedding_quantization = None
+        self._interpreter_pool = None
+
+        # Number of chunks passed to the interpreter per invocation.
+        self.batch_size = max(1, int(batch_size))
+        self.num_threads = max(1, int(num_threads))
 
         self.custom_interpreter = None
         self.custom_input_details = None
         self.custom_output_details = None
         self.custom_input_layer_index = None
         self.custom_output_layer_index = None
+        self.custom_input_size = None
+        self._custom_interpreter_pool = None
 
         self.labels = []
-        self.results = []
-        self.embeddings = []
+        self._parsed_labels = []
+        self.results = self._pack_results(
+            {"times": [], "counts": [], "labels": [], "confidences": []}
+        )
+        self._set_embeddings([], [])
         self.custom_species_list = []
 
         # Set model versions.
         self.model_path = MODEL_PATH
         self.label_path = LABEL_PATH
         self.version = str(version if version else MODEL_VERSION)
+        self.precision = self.resolve_precision(precision)
 
         if self.version == MODEL_VERSION:
             self.version_date = MODEL_RELEASE_DATE
 
         self.model_download_was_required = False
-        if self.version != MODEL_VERSION:
-            # Download version dynamically if there's a match.
+        if self.version != MODEL_VERSION or self.precision != "fp32":
+            # Download version (or quantized model) dynamically if there's a match.
             self.check_for_model_files()
 
         self.classifier_model_path = classifier_model_path
@@ -136,12 +299,31 @@ class Analyzer:
             self.has_custom_species_list = True
             self.custom_species_list = custom_species_list
 
-    def check_for_model_files(self, verbose=False):
-        # Check if the models have already been downloaded.
-        version_model_path = os.path.join(
+    def version_model_path(self, precision):
+        return os.path.join(
             os.path.dirname(__file__),
-            f"models/analyzer/{self.version}/Model_FP32.tflite",
+            f"models/analyzer/{self.version}/Model_{precision.upper()}.tflite",
         )
+
+    def resolve_precision(self, precision=None):
+        # Explicit argument, then the BIRDNET_PRECISION environment variable.
+        precision = precision or os.environ.get("BIRDNET_PRECISION")
+        if precision:
+            precision = str(precision).lower()
+            if precision not in MODEL_PRECISIONS:
+                raise AnalyzerConfigurationError(
+                    f"precision must be one of {', '.join(MODEL_PRECISIONS)}"
+                )
+            return precision
+
+        # Otherwise, prefer an already installed INT8 model on CPUs that run it quickly.
+        if os.path.exists(self.version_model_path("int8")) and cpu_supports_fast_int8():
+            return "int8"
+        return "fp32"
+
+    def check_for_model_files(self, verbose=False):
+        # Check if the models have already been downloaded.
+        version_model_path = self.version_model_path(self.precision)
         if verbose:
             print(version_model_path)
 
@@ -189,6 +371,8 @@ class Analyzer:
                 (i for i in data if i["version"] == str(self.version)), None
             )
             if verbose:
+                from pprint import pprint
+
                 pprint(version_data)
         else:
             if verbose:
@@ -215,56 +399,55 @@ class Analyzer:
         self.version_date = datetime.strptime(version_data["date"], "%Y-%m-%d")
 
         # Download the model.
-        model_url = f"{versions_root}/{version_data['model_fp32']}"
+        model_key = f"model_{self.precision}"
+        if model_key not in version_data:
+            raise AnalyzerConfigurationError(
+                f"No {self.precision} model is available for version {self.version}."
+            )
+        model_url = f"{versions_root}/{version_data[model_key]}"
         if not os.path.exists(version_model_path):
             if verbose:
                 print("BirdNET version model is missing. Downloading now.")
-            response = requests.get(model_url)
-            if response.status_code == 200:
-                with open(version_model_path, "wb") as file:
-                    file.write(response.content)
-                if verbose:
-                    print("BirdNET model downloaded successfully.")
-                self.model_download_was_required = True
-                self.model_path = version_model_path
-            else:
-                if verbose:
-                    print("Failed to download the file.")
+            download_file(model_url, version_model_path)
+            if verbose:
+                print("BirdNET model downloaded successfully.")
+            self.model_download_was_required = True
+            self.model_path = version_model_path
+        else:
+            self.model_path = version_model_path
 
         # Download the labels.
         labels_url = f"{versions_root}/{version_data['labels']}"
         if not os.path.exists(version_labels_path):
             if verbose:
                 print("BirdNET version label file is missing. Downloading now.")
-            response = requests.get(labels_url)
-            if response.status_code == 200:
-                with open(version_labels_path, "wb") as file:
-                    file.write(response.content)
-                if verbose:
-                    print("BirdNET labels downloaded successfully.")
-                self.label_path = version_labels_path
-            else:
-                if verbose:
-                    print("Failed to download the file.")
+            download_file(labels_url, version_labels_path)
+            if verbose:
+                print("BirdNET labels downloaded successfully.")
+            self.label_path = version_labels_path
 
     @property
     def detections(self):
+        return self._detections_from_results(self.results)
+
+    def _detections_from_results(self, results):
         detections = []
-        for key, value in self.results.items():
-            # print(f"{key} -----")
-            start_time = float(key.split("-")[0])
-            end_time = float(key.split("-")[1])
-            for c in value:
-                confidence = float(c[1])
-                label = c[0]
-                scientific_name = label.split("_")[0]
-                common_name = label.split("_")[1]
-                # print(c[0], f"{c[1]:1.4f}")
+        times = results["times"].tolist()
+        offsets = results["offsets"].tolist()
+        label_indices = results["labels"].tolist()
+        confidences = results["confidences"].tolist()
+        for (start_time, end_time), first, last in zip(
+            times, offsets[:-1], offsets[1:]
+        ):
+            for label_index, confidence in zip(
+                label_indices[first:last], confidences[first:last]
+            ):
+                scientific_name, common_name = self._parsed_labels[label_index]
                 d = Detection(start_time, end_time)
                 d.common_name = common_name
                 d.scientific_name = scientific_name
-                d.confidence = confidence
-                d.label = label
+                d.confidence = float(confidence)
+                d.label = self.labels[label_index]
                 # print(d.as_dict)
                 detections.append(d)
 
@@ -272,32 +455,67 @@ class Analyzer:
 
     def predict(self, sample):
         # Prepare sample and pass through model
-        data = np.array([sample], dtype="float32")
-
-        self.interpreter.resize_tensor_input(
-            self.input_layer_index, [len(data), *data[0].shape]
-        )
-        self.interpreter.allocate_tensors()
-
-        # Make a prediction (Audio only for now)
-        self.interpreter.set_tensor(
-            self.input_layer_index, np.array(data, dtype="float32")
-        )
-        self.interpreter.invoke()
-        prediction = self.interpreter.get_tensor(self.output_layer_index)
+        return self._predict_batch(self._as_batch(sample))
+
+    def _as_batch(self, sample):
+        # A (1, samples) view of sample; only copied if it isn't contiguous float32 already.
+        return np.ascontiguousarray(sample, dtype=np.float32)[np.newaxis, ...]
+
+    def _predict_batch(self, data):
+        # data is a (batch, samples) float32 array.
+        with self._interpreter_pool.acquire() as state:
+            interpreter = state["interpreter"]
+            self._resize_input(state, self.input_layer_index, data.shape)
+
+            # Make a prediction (Audio only for now)
+            interpreter.set_tensor(self.input_layer_index, self._prepare_input(data))
+            interpreter.invoke()
+            prediction = self._dequantize(
+                interpreter.get_tensor(self.output_layer_index),
+                self._output_quantization,
+            )
 
         # Logits or sigmoid activations?
         APPLY_SIGMOID = True
         if APPLY_SIGMOID:
             SIGMOID_SENSITIVITY = 1.0
-            prediction = self.flat_sigmoid(
-                np.array(prediction), sensitivity=-SIGMOID_SENSITIVITY
-            )
+            prediction = self.flat_sigmoid(prediction, sensitivity=-SIGMOID_SENSITIVITY)
 
         return prediction
 
+    def _resize_input(self, interpreter_state, input_index, shape):
+        # Only resize when the batch shape changes (e.g. the trailing partial batch).
+        # The shape is tracked per pooled interpreter, not on this instance.
+        if interpreter_state["input_shape"] != shape:
+            interpreter = interpreter_state["interpreter"]
+            interpreter.resize_tensor_input(input_index, list(shape))
+            interpreter.allocate_tensors()
+            interpreter_state["input_shape"] = shape
+
+    def _prepare_input(self, data):
+        if self._input_quantization is None:
+            return np.ascontiguousarray(data, dtype=np.float32)
+
+        # Fully quantized models take integer input: q = x / scale + zero_point.
+        input_dtype, scale, zero_point = self._input_quantization
+        limits = np.iinfo(input_dtype)
+        quantized = np.round(np.asarray(data, dtype="float32") / scale + zero_point)
+        return np.clip(quantized, limits.min, limits.max).astype(input_dtype)
+
+    def _dequantize(self, tensor, quantization):
+        # quantization is the tensor's (scale, zero_point), or None if it's float.
+        if quantization is None:
+            return tensor
+        scale, zero_point = quantization
+        return (tensor.astype("float32") - zero_point) * scale
+
     def flat_sigmoid(self, x, sensitivity=-1):
-        return 1 / (1.0 + np.exp(sensitivity * np.clip(x, -15, 15)))
+        # Clip into one float32 buffer, then scale, exp and invert it in place.
+        out = np.clip(np.asarray(x, dtype=np.float32), -15, 15)
+        out *= sensitivity
+        np.exp(out, out=out)
+        out += 1.0
+        return np.reciprocal(out, out=out)
 
     def return_predicted_species_list(
         self,
@@ -350,62 +568,124 @@ class Analyzer:
                 print("recording has lon/lat")
             self.set_predicted_species_list_from_position(recording)
 
-        start = 0
-        end = recording.sample_secs
-        results = {}
-        for c in recording.chunks:
+        times = self._chunk_times(recording, len(recording.chunks))
+        results = {"times": [], "counts": [], "labels": [], "confidences": []}
+        i = 0
+        for batch in self._chunk_batches(recording):
+            # Run up to batch_size chunks through the interpreter in a single invocation.
             if self.use_custom_classifier:
-                pred = self.predict_with_custom_classifier(c)[0]
+                preds = self._predict_batch_with_custom_classifier(batch)
             else:
-                pred = self.predict(c)[0]
+                preds = self._predict_batch(batch)
 
-            # Assign scores to labels
-            p_labels = dict(zip(self.labels, pred))
-
-            # Sort by score
-            p_sorted = sorted(
-                p_labels.items(), key=operator.itemgetter(1), reverse=True
+            self._append_results(
+                results, times[i : i + len(preds)], preds, recording.minimum_confidence
             )
-
-            # Filter by recording.minimum_confidence so not to needlessly store full 8K array for each chunk.
-            p_sorted = [i for i in p_sorted if i[1] >= recording.minimum_confidence]
-
-            # Store results
-            results[str(start) + "-" + str(end)] = p_sorted
-
-            # Increment start and end
-            start += recording.sample_secs - recording.overlap
-            end = start + recording.sample_secs
-
-        self.results = results
-        recording.detection_list = self.detections
+            i += len(preds)
+
+        # Build the detections from the local results rather than self.results,
+        # which another call to analyze_recording may have replaced meanwhile.
+        packed_results = self._pack_results(results)
+        self.results = packed_results
+        recording.detection_list = self._detections_from_results(packed_results)
+
+    def _chunk_batches(self, recording):
+        # Yields the recording's chunks in order, as (batch_size, samples) float32
+        # arrays. Each batch is a slice of one of recording.chunk_blocks (the strided
+        # full chunks and the zero-padded tail), only copied when the chunks overlap
+        # or the batch spans both blocks.
+        def join(parts):
+            if len(parts) == 1:
+                return np.ascontiguousarray(parts[0], dtype=np.float32)
+            return np.concatenate(parts, dtype=np.float32)
+
+        pending = []
+        n_pending = 0
+        for block in recording.chunk_blocks:
+            start = 0
+            while start < len(block):
+                part = block[start : start + self.batch_size - n_pending]
+                pending.append(part)
+                n_pending += len(part)
+                start += len(part)
+                if n_pending == self.batch_size:
+                    yield join(pending)
+                    pending = []
+                    n_pending = 0
+        if pending:
+            yield join(pending)
+
+    def _chunk_times(self, recording, n_chunks):
+        # (n_chunks, 2) array of chunk start/end times in seconds.
+        starts = np.arange(n_chunks) * float(recording.sample_secs - recording.overlap)
+        return np.column_stack((starts, starts + recording.sample_secs))
+
+    def _append_results(self, results, batch_times, preds, minimum_confidence):
+        # Filter by minimum_confidence so not to needlessly store the full 8K array
+        # for each chunk, then sort by score, for the whole (batch, classes) matrix
+        # at once. Labels are kept as indices into self.labels.
+        rows, labels = np.nonzero(preds >= minimum_confidence)
+        confidences = preds[rows, labels]
+        # Group by chunk, then by descending score (lexsort is stable, so ties keep
+        # label order).
+        order = np.lexsort((-confidences, rows))
+        results["times"].extend(batch_times)
+        results["counts"].append(np.bincount(rows, minlength=len(preds)))
+        results["labels"].append(labels[order])
+        results["confidences"].append(confidences[order])
+
+    def _pack_results(self, results):
+        # Flatten per-chunk results into arrays. Chunk i spans times[i] and owns
+        # labels[offsets[i]:offsets[i + 1]] and the matching confidences.
+        counts = np.concatenate(
+            [np.empty(0, dtype=np.int64)] + results["counts"], dtype=np.int64
+        )
+        return {
+            "times": np.array(results["times"], dtype=np.float64).reshape(-1, 2),
+            "offsets": np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+            "labels": np.concatenate(
+                [np.empty(0, dtype=np.int32)] + results["labels"], dtype=np.int32
+            ),
+            "confidences": np.concatenate(
+                [np.empty(0, dtype=np.float32)] + results["confidences"],
+                dtype=np.float32,
+            ),
+        }
 
     def extract_embeddings_for_recording(self, recording, verbose=False):
         if verbose:
             print("extract_embeddings_for_recording", recording.filename)
-        start = 0
-        end = recording.sample_secs
-        results = []
-        for sample in recording.chunks:
-            data = np.array([sample], dtype="float32")
-            e = self._return_embeddings(data)[0].tolist()
-            results.append({"start_time": start, "end_time": end, "embeddings": e})
-
-            # Increment start and end
-            start += recording.sample_secs - recording.overlap
-            end = start + recording.sample_secs
+        times = self._chunk_times(recording, len(recording.chunks))
+        features = [
+            self._return_embeddings(batch) for batch in self._chunk_batches(recording)
+        ]
+
+        self._set_embeddings(times, features)
+
+    def _set_embeddings(self, times, features):
+        # Embeddings are kept as an (n_chunks, embedding_dim) array; the list of
+        # dicts in `embeddings` is only built when it's asked for.
+        self.embedding_times = np.array(times, dtype=np.float64).reshape(-1, 2)
+        if features:
+            self.embeddings_array = np.concatenate(features)
+        else:
+            self.embeddings_array = np.empty((0, 0), dtype=np.float32)
 
-        self.embeddings = results
+    @property
+    def embeddings(self):
+        return [
+            {"start_time": start, "end_time": end, "embeddings": e}
+            for (start, end), e in zip(
+                self.embedding_times.tolist(), self.embeddings_array.tolist()
+            )
+        ]
 
     def load_model(self, verbose=False):
         if verbose:
             print("load model", not self.use_custom_classifier)
-        # Load TFLite model and allocate tensors.
-        num_threads = 1  # Default from BN-A config
-        self.interpreter = tflite.Interpreter(
-            model_path=self.model_path, num_threads=num_threads
-        )
-        self.interpreter.allocate_tensors()
+        # Load TFLite model and allocate tensors, reusing an already loaded interpreter.
+        self._interpreter_pool = _load_interpreter(self.model_path, self.num_threads)
+        self.interpreter = self._interpreter_pool.interpreter
 
         # Get input and output tensors.
         self.input_details = self.interpreter.get_input_details()
@@ -420,20 +700,63 @@ class Analyzer:
         else:
             self.output_layer_index = self.output_details[0]["index"]
 
+        # Feature embeddings are the tensor just before the classification output.
+        self.embedding_output_index = self.output_details[0]["index"] - 1
+
+        # The input dtype is fixed per model, so decide once whether batches need
+        # quantizing rather than inspecting input_details on every call.
+        input_dtype = self.input_details[0]["dtype"]
+        if input_dtype == np.float32:
+            self._input_quantization = None
+        else:
+            scale, zero_point = self.input_details[0]["quantization"]
+            self._input_quantization = (input_dtype, scale, zero_point)
+
+        # Likewise for the outputs read back. The embeddings tensor isn't a model
+        # output, so its quantization comes from the full tensor details.
+        tensor_details = {
+            details["index"]: details
+            for details in self.interpreter.get_tensor_details()
+        }
+        self._output_quantization = self._tensor_quantization(
+            tensor_details[self.output_layer_index]
+        )
+        self._embedding_quantization = self._tensor_quantization(
+            tensor_details[self.embedding_output_index]
+        )
+
         if verbose:
             print("Model loaded.")
 
+    @staticmethod
+    def _tensor_quantization(tensor_details):
+        if tensor_details["dtype"] == np.float32:
+            return None
+        return tensor_details["quantization"]
+
+    @classmethod
+    def preload(cls, model_path=None, num_threads=DEFAULT_NUM_THREADS):
+        # Load and warm up the interpreter ahead of time (e.g. at server start) so
+        # Analyzer instances created later reuse it instead of loading the model.
+        _load_interpreter(model_path or MODEL_PATH, num_threads)
+
     def load_labels(self, verbose=False):
         labels_file_path = self.label_path
         if self.classifier_labels_path:
             if verbose:
                 print("loading custom classifier labels")
             labels_file_path = self.classifier_labels_path
-        labels = []
+        # Blank lines are kept so label indices stay aligned with the model outputs.
         with open(labels_file_path, "r") as lfile:
-            for line in lfile.readlines():
-                labels.append(line.replace("\n", ""))
+            labels = lfile.read().splitlines()
         self.labels = labels
+
+        # Split labels into (scientific_name, common_name) once, rather than per detection.
+        self._parsed_labels = []
+        for label in labels:
+            parts = label.split("_")
+            self._parsed_labels.append((parts[0], parts[1] if len(parts) > 1 else ""))
+
         if verbose:
             print("Labels loaded.")
 
@@ -441,10 +764,12 @@ class Analyzer:
         species_list = []
         if os.path.isfile(self.custom_species_list_path):
             with open(self.custom_species_list_path, "r") as csfile:
-                for line in csfile.readlines():
-                    if verbose:
-                        print(line)
-                    species_list.append(line.replace("\r", "").replace("\n", ""))
+                species_list = [
+                    line.strip() for line in csfile.read().splitlines() if line.strip()
+                ]
+            if verbose:
+                for line in species_list:
+                    print(line)
 
         self.custom_species_list = species_list
         if verbose:
@@ -452,61 +777,57 @@ class Analyzer:
 
     # Custom models.
     def _return_embeddings(self, data):
-        self.interpreter.resize_tensor_input(
-            self.input_layer_index, [len(data), *data[0].shape]
-        )
-        self.interpreter.allocate_tensors()
-        # Extract feature embeddings
-        self.interpreter.set_tensor(
-            self.input_layer_index, np.array(data, dtype="float32")
-        )
-        self.interpreter.invoke()
-
-        # Embeddings uses custom classifier output layer index.
-        output_layer_index = self.output_layer_index
-        if not self.use_custom_classifier:
-            output_layer_index = output_layer_index - 1
-
-        features = self.interpreter.get_tensor(output_layer_index)
+        with self._interpreter_pool.acquire() as state:
+            interpreter = state["interpreter"]
+            self._resize_input(state, self.input_layer_index, data.shape)
+
+            # Extract feature embeddings
+            interpreter.set_tensor(self.input_layer_index, self._prepare_input(data))
+            interpreter.invoke()
+            features = self._dequantize(
+                interpreter.get_tensor(self.embedding_output_index),
+                self._embedding_quantization,
+            )
         return features
 
     def predict_with_custom_classifier(self, sample):
-        data = np.array([sample], dtype="float32")
-        input_details = self.custom_interpreter.get_input_details()
-        input_size = input_details[0]["shape"][-1]
-        feature_vector = self._return_embeddings(data) if input_size != 144000 else data
-        self.custom_interpreter.resize_tensor_input(
-            self.custom_input_layer_index,
-            [len(feature_vector), *feature_vector[0].shape],
-        )
-        self.custom_interpreter.allocate_tensors()
+        return self._predict_batch_with_custom_classifier(self._as_batch(sample))
 
-        # Make a prediction
-        self.custom_interpreter.set_tensor(
-            self.custom_input_layer_index, np.array(feature_vector, dtype="float32")
-        )
-        self.custom_interpreter.invoke()
-        prediction = self.custom_interpreter.get_tensor(self.custom_output_layer_index)
+    def _predict_batch_with_custom_classifier(self, data):
+        if self.custom_input_size == 144000:
+            # Classifier takes raw audio rather than embeddings.
+            feature_vector = data
+        else:
+            feature_vector = self._return_embeddings(data)
+        with self._custom_interpreter_pool.acquire() as state:
+            interpreter = state["interpreter"]
+            self._resize_input(
+                state, self.custom_input_layer_index, feature_vector.shape
+            )
+
+            # Make a prediction
+            interpreter.set_tensor(
+                self.custom_input_layer_index,
+                np.ascontiguousarray(feature_vector, dtype=np.float32),
+            )
+            interpreter.invoke()
+            prediction = interpreter.get_tensor(self.custom_output_layer_index)
 
         # Logits or sigmoid activations?
         APPLY_SIGMOID = True
         if APPLY_SIGMOID:
             SIGMOID_SENSITIVITY = 1.0
-            prediction = self.flat_sigmoid(
-                np.array(prediction), sensitivity=-SIGMOID_SENSITIVITY
-            )
+            prediction = self.flat_sigmoid(prediction, sensitivity=-SIGMOID_SENSITIVITY)
         return prediction
 
     def load_custom_models(self, verbose=False):
         if verbose:
             print("load_custom_models")
-        # Load TFLite model and allocate tensors.
-        model_path = self.classifier_model_path
-        num_threads = 1  # Default from BN-A config
-        self.custom_interpreter = tflite.Interpreter(
-            model_path=model_path, num_threads=num_threads
+        # Load TFLite model and allocate tensors, reusing an already loaded interpreter.
+        self._custom_interpreter_pool = _load_interpreter(
+            self.classifier_model_path, self.num_threads
         )
-        self.custom_interpreter.allocate_tensors()
+        self.custom_interpreter = self._custom_interpreter_pool.interpreter
 
         # Get input and output tensors.
         self.custom_input_details = self.custom_interpreter.get_input_details()
@@ -515,6 +836,7 @@ class Analyzer:
         # Get input tensor index
         self.custom_input_layer_index = self.custom_input_details[0]["index"]
         self.custom_output_layer_index = self.custom_output_details[0]["index"]
+        self.custom_input_size = int(self.custom_input_details[0]["shape"][-1])
 
         if verbose:
             print("Custom model loaded.")
@@ -528,6 +850,9 @@ class LargeRecordingAnalyzer(Analyzer):
         classifier_model_path=None,
         classifier_labels_path=None,
         version=None,
+        batch_size=8,
+        precision=None,
+        num_threads=DEFAULT_NUM_THREADS,
     ):
         super().__init__(
             custom_species_list_path,
@@ -535,6 +860,9 @@ class LargeRecordingAnalyzer(Analyzer):
             classifier_model_path,
             classifier_labels_path,
             version,
+            batch_size,
+            precision,
+            num_threads,
         )
 
     def analyze_recording(self, recording, verbose=False):
@@ -551,72 +879,62 @@ class LargeRecordingAnalyzer(Analyzer):
                 print("recording has lon/lat")
             self.set_predicted_species_list_from_position(recording)
 
-        start = 0
-        end = recording.sample_secs
-        results = {}
+        results = {"times": [], "counts": [], "labels": [], "confidences": []}
 
         # Read segments via generator function so that the entire audio file is never loaded into RAM.
         # TODO: Adapt this to be used by all Analyzers, assuming this works well with Canopy testing.
 
+        # Segments are copied into a fixed buffer and flushed through the interpreter
+        # batch_size at a time, so memory stays bounded regardless of file length.
+        segment_samples = int(recording.sample_secs * 48000)
+        batch = np.empty((self.batch_size, segment_samples), dtype=np.float32)
+        batch_times = []
         for segment in read_audio_segments(recording.path, sr=48000):
-            c = segment["segment"]
-            if len(c) < recording.sample_secs * 48000:
+            c = segment.pop("segment")
+            if len(c) < segment_samples:
                 # If below the minimum segment duration, continue.
                 del c
                 continue
-            start = segment["start_sec"]
-            end = segment["end_sec"]
-            if self.use_custom_classifier:
-                pred = self.predict_with_custom_classifier(c)[0]
-            else:
-                pred = self.predict(c)[0]
+            batch[len(batch_times)] = c[:segment_samples]
+            batch_times.append((segment["start_sec"], segment["end_sec"]))
+            del c
 
-            # Assign scores to labels
-            p_labels = dict(zip(self.labels, pred))
+            if len(batch_times) == self.batch_size:
+                self._analyze_segment_batch(recording, batch, batch_times, results)
+                batch_times = []
 
-            # Sort by score
-            p_sorted = sorted(
-                p_labels.items(), key=operator.itemgetter(1), reverse=True
+        # Flush the trailing partial batch.
+        if batch_times:
+            self._analyze_segment_batch(
+                recording, batch[: len(batch_times)], batch_times, results
             )
 
-            # Filter by recording.minimum_confidence so not to needlessly store full 8K array for each chunk.
-            p_sorted_filtered = [
-                i for i in p_sorted if i[1] >= recording.minimum_confidence
-            ]
+        packed_results = self._pack_results(results)
+        self.results = packed_results
+        recording.detection_list = self._detections_from_results(packed_results)
 
-            # Store results
-            results[str(start) + "-" + str(end)] = p_sorted_filtered
-
-            # Clean up.
-            del pred
-            del p_labels
-            del p_sorted
-            del c
+    def _analyze_segment_batch(self, recording, batch, batch_times, results):
+        if self.use_custom_classifier:
+            preds = self._predict_batch_with_custom_classifier(batch)
+        else:
+            preds = self._predict_batch(batch)
 
-        self.results = results
-        recording.detection_list = self.detections
+        self._append_results(results, batch_times, preds, recording.minimum_confidence)
 
     def extract_embeddings_for_recording(self, recording, verbose=False):
         if verbose:
             print("extract_embeddings_for_recording", recording.filename)
-        start = 0
-        end = recording.sample_secs
-        results = []
+        times = []
+        features = []
+        segment_samples = int(recording.sample_secs * 48000)
         for segment in read_audio_segments(recording.path, sr=48000):
             c = segment["segment"]
-            if len(c) < recording.sample_secs * 48000:
+            if len(c) < segment_samples:
                 # If below the minimum segment duration, continue.
                 del c
                 continue
-            start = segment["start_sec"]
-            end = segment["end_sec"]
-
-            data = np.array([c], dtype="float32")
-            e = self._return_embeddings(data)[0].tolist()
-            results.append({"start_time": start, "end_time": end, "embeddings": e})
 
-            # Increment start and end
-            start += recording.sample_secs - recording.overlap
-            end = start + recording.sample_secs
+            features.append(self._return_embeddings(self._as_batch(c)))
+            times.append((segment["start_sec"], segment["end_sec"]))
 
-        self.embeddings = results
+        self._set_embeddings(times, features)
@@ -13,10 +13,9 @@ except:
 import numpy as np
 import math
 import time
-import operator
-import requests
 
 from birdnetlib import Detection
+from birdnetlib.utils import download_file
 
 MODEL_PATH = os.path.join(
     os.path.dirname(__file__), "models/lite/BirdNET_6K_GLOBAL_MODEL.tflite"
@@ -58,29 +57,17 @@ class LiteAnalyzer:
         if not os.path.exists(MODEL_PATH):
             if verbose:
                 print("BirdNET-Lite model is missing. Downloading now.")
-            response = requests.get(MODEL_URL)
-            if response.status_code == 200:
-                with open(MODEL_PATH, "wb") as file:
-                    file.write(response.content)
-                if verbose:
-                    print("BirdNET-Lite model downloaded successfully.")
-                self.model_download_was_required = True
-            else:
-                if verbose:
-                    print("Failed to download the file.")
+            download_file(MODEL_URL, MODEL_PATH)
+            if verbose:
+                print("BirdNET-Lite model downloaded successfully.")
+            self.model_download_was_required = True
 
         if not os.path.exists(LABEL_PATH):
             if verbose:
                 print("BirdNET-Lite labels are missing. Downloading now.")
-            response = requests.get(LABEL_URL)
-            if response.status_code == 200:
-                with open(LABEL_PATH, "wb") as file:
-                    file.write(response.content)
-                if verbose:
-                    print("BirdNET-Lite labels downloaded successfully.")
-            else:
-                if verbose:
-                    print("Failed to download the file.")
+            download_file(LABEL_URL, LABEL_PATH)
+            if verbose:
+                print("BirdNET-Lite labels downloaded successfully.")
 
     def load_lite_model(self, verbose=False):
         self.interpreter = tflite.Interpreter(model_path=MODEL_PATH)
@@ -96,8 +83,7 @@ class LiteAnalyzer:
 
         # Load labels
         with open(LABEL_PATH, "r") as lfile:
-            for line in lfile.readlines():
-                self.classes.append(line.replace("\n", ""))
+            self.classes.extend(lfile.read().splitlines())
 
         if verbose:
             print("Lite model loaded")
@@ -108,10 +94,12 @@ class LiteAnalyzer:
         slist = []
         if os.path.isfile(self.custom_species_list_path):
             with open(self.custom_species_list_path, "r") as csfile:
-                for line in csfile.readlines():
-                    if verbose:
-                        print(line)
-                    slist.append(line.replace("\r", "").replace("\n", ""))
+                slist = [
+                    line.strip() for line in csfile.read().splitlines() if line.strip()
+                ]
+            if verbose:
+                for line in slist:
+                    print(line)
 
         self.custom_species_list = slist
 
@@ -150,11 +138,11 @@ class LiteAnalyzer:
         # Apply custom sigmoid
         p_sigmoid = self.custom_sigmoid(prediction, sensitivity)
 
-        # Get label and scores for pooled predictions
-        p_labels = dict(zip(self.classes, p_sigmoid))
-
-        # Sort by score
-        p_sorted = sorted(p_labels.items(), key=operator.itemgetter(1), reverse=True)
+        # Get label and scores for the ten highest pooled predictions, sorted by score
+        k = min(10, p_sigmoid.size)
+        top = np.argpartition(-p_sigmoid, k - 1)[:k]
+        top = top[np.argsort(-p_sigmoid[top], kind="stable")]
+        p_sorted = [(self.classes[i], p_sigmoid[i]) for i in top]
 
         # Remove species that are on blacklist
         for i in range(min(10, len(p_sorted))):
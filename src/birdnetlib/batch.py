@@ -127,11 +127,13 @@ def process_from_queue(queue_item, analyzers=None, verbose=False):
             else:
                 from birdnetlib.analyzer import Analyzer
 
+                # Recordings are already spread across processes, so one interpreter thread each.
                 analyzers.append(
                     Analyzer(
                         custom_species_list_path=i["custom_species_list_path"],
                         classifier_model_path=i["classifier_model_path"],
                         classifier_labels_path=i["classifier_labels_path"],
+                        num_threads=1,
                     )
                 )
 
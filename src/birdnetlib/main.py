@@ -1,23 +1,53 @@
 import librosa
 import numpy as np
-import pydub
+import soundfile as sf
 from birdnetlib.exceptions import (
     AudioFormatError,
     AnalyzerRuntimeWarning,
     IncompatibleAnalyzerError,
 )
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import audioread
 from os import path
 from birdnetlib.utils import return_week_48_from_datetime
 from pathlib import Path
-import matplotlib.pyplot as plt
 from collections import namedtuple
 from birdnetlib.analyzer import LargeRecordingAnalyzer
 
 SAMPLE_RATE = 48000
 
 
+def _decode_audio(source):
+    # Decode with libsndfile and resample with soxr (when installed), skipping
+    # librosa's audioread path. Formats libsndfile can't read still go through
+    # librosa.load.
+    try:
+        ndarray, rate = sf.read(source, dtype="float32")
+    except RuntimeError:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        ndarray, _ = librosa.load(
+            source, sr=SAMPLE_RATE, mono=True, res_type="kaiser_fast"
+        )
+        return ndarray
+
+    if ndarray.ndim > 1:
+        ndarray = librosa.to_mono(ndarray.T)
+    if rate != SAMPLE_RATE:
+        try:
+            import soxr
+        except ImportError:
+            # soxr is only installed with librosa >= 0.10.
+            return librosa.resample(
+                ndarray, orig_sr=rate, target_sr=SAMPLE_RATE, res_type="kaiser_fast"
+            )
+        ndarray = soxr.resample(ndarray, rate, SAMPLE_RATE, quality="HQ")
+    return ndarray
+
+
 class RecordingBase:
     def __init__(
         self,
@@ -34,9 +64,13 @@ class RecordingBase:
         self.analyzer = analyzer
         self.detections_dict = {}  # Old format
         self.detection_list = []
+        self._qualified_detections = None
+        self._qualified_detections_key = None
         self.analyzed = False
         self.embeddings_extracted = False
         self.embeddings_list = []
+        self.embeddings_array = None
+        self.embedding_times = None
         self.week_48 = week_48
         self.date = date
         self.sensitivity = max(0.5, min(1.0 - (sensitivity - 1.0), 1.5))
@@ -47,6 +81,7 @@ class RecordingBase:
         self.sample_secs = 3.0
         self.duration = None
         self.ndarray = None
+        self._chunk_rate = None
         self.extracted_audio_paths = {}
         self.extracted_spectrogram_paths = {}
         self.return_all_detections = return_all_detections
@@ -68,15 +103,30 @@ class RecordingBase:
             self.week_48 = return_week_48_from_datetime(self.date)
 
         # Read and analyze.
-        self.read_audio_data()
+        self._read_audio_data_once()
         self.analyzer.analyze_recording(self)
         self.analyzed = True
 
     def extract_embeddings(self):
         # Read and analyze.
-        self.read_audio_data()
+        self._read_audio_data_once()
         self.analyzer.extract_embeddings_for_recording(self)
-        self.embeddings_list = self.analyzer.embeddings
+        self._store_embeddings()
+
+    def _read_audio_data_once(self):
+        # analyze() and extract_embeddings() share the audio, which is only decoded
+        # by whichever runs first. Chunking is cheap, so it's redone in case overlap
+        # changed in between.
+        if self.ndarray is None:
+            self.read_audio_data()
+        elif self._chunk_rate is not None:
+            self.process_audio_data(self._chunk_rate)
+
+    def _store_embeddings(self):
+        # Keep the analyzer's arrays; the list of dicts is built on first access.
+        self.embeddings_array = self.analyzer.embeddings_array
+        self.embedding_times = self.analyzer.embedding_times
+        self.embeddings_list = None
         self.embeddings_extracted = True
 
     @property
@@ -86,6 +136,13 @@ class RecordingBase:
                 "'extract_embeddings' method has not been called. Call .extract_embeddings() before accessing embeddings.",
                 AnalyzerRuntimeWarning,
             )
+        if self.embeddings_list is None:
+            self.embeddings_list = [
+                {"start_time": start, "end_time": end, "embeddings": e}
+                for (start, end), e in zip(
+                    self.embedding_times.tolist(), self.embeddings_array.tolist()
+                )
+            ]
         return self.embeddings_list
 
     @property
@@ -95,31 +152,51 @@ class RecordingBase:
                 "'analyze' method has not been called. Call .analyze() before accessing detections.",
                 AnalyzerRuntimeWarning,
             )
+        if not self.return_all_detections:
+            return [
+                self.return_detection_dict(d) for d, _ in self._qualify_detections()
+            ]
+
+        qualified_detections = []
+        for d, is_predicted in self._qualify_detections():
+            detection = self.return_detection_dict(d)
+            detection["is_predicted_for_location_and_date"] = is_predicted
+            qualified_detections.append(detection)
+        return qualified_detections
+
+    def _qualify_detections(self):
+        # Returns (detection, is_predicted_for_location_and_date) pairs that pass
+        # min_conf and the species list. The filtering is cached, keyed on a snapshot
+        # of its inputs, so it's redone when the detection list, species list or
+        # settings change, in place or not.
+        key = (
+            tuple(self.detection_list),
+            tuple(self.analyzer.custom_species_list),
+            self.minimum_confidence,
+            self.return_all_detections,
+        )
+        if key == self._qualified_detections_key:
+            return self._qualified_detections
+
+        # A set, so membership doesn't scan the species list for every detection.
+        allow_list = frozenset(self.analyzer.custom_species_list)
         qualified_detections = []
-        allow_list = self.analyzer.custom_species_list
         for d in self.detection_list:
-            if self.return_all_detections:
-                if d.confidence > self.minimum_confidence:
-                    detection = self.return_detection_dict(d)
-                    detection["is_predicted_for_location_and_date"] = (
-                        f"{d.scientific_name}_{d.common_name}" in allow_list
-                    )
-                    qualified_detections.append(detection)
-            else:
-                if d.confidence > self.minimum_confidence and (
-                    f"{d.scientific_name}_{d.common_name}" in allow_list
-                    or len(allow_list) == 0
-                ):
-                    detection = self.return_detection_dict(d)
-                    qualified_detections.append(detection)
+            if d.confidence <= self.minimum_confidence:
+                continue
+            is_predicted = f"{d.scientific_name}_{d.common_name}" in allow_list
+            if self.return_all_detections or is_predicted or len(allow_list) == 0:
+                qualified_detections.append((d, is_predicted))
 
+        self._qualified_detections = qualified_detections
+        self._qualified_detections_key = key
         return qualified_detections
 
     def return_detection_dict(self, detection_obj):
         detection = detection_obj.as_dict
 
         # Add extraction paths if available.
-        extraction_key = f"{detection['start_time']}_{detection['end_time']}"
+        extraction_key = (detection["start_time"], detection["end_time"])
         audio_file_path = self.extracted_audio_paths.get(extraction_key, None)
         if audio_file_path:
             detection["extracted_audio_path"] = audio_file_path
@@ -152,23 +229,38 @@ class RecordingBase:
         seconds = self.sample_secs
         minlen = 1.5
 
-        chunks = []
-        for i in range(0, len(self.ndarray), int((seconds - self.overlap) * rate)):
-            split = self.ndarray[i : i + int(seconds * rate)]
-
-            # End of signal?
-            if len(split) < int(minlen * rate):
-                break
-
-            # Signal chunk too short? Fill with zeros.
-            if len(split) < int(rate * seconds):
-                temp = np.zeros((int(rate * seconds)))
-                temp[: len(split)] = split
-                split = temp
-
-            chunks.append(split)
-
-        self.chunks = chunks
+        step = int((seconds - self.overlap) * rate)
+        window = int(seconds * rate)
+        min_samples = int(minlen * rate)
+        n_samples = len(self.ndarray)
+
+        # A chunk starts every step samples, up to the end of signal (the last start
+        # with at least minlen seconds remaining).
+        n_chunks = 0
+        if n_samples >= min_samples:
+            n_chunks = (n_samples - min_samples) // step + 1
+
+        # Full chunks are a (n_full, window) strided view over the signal, so they
+        # aren't copied. Chunks running past the end of signal (signal chunk too
+        # short) are copied into a small zero-padded (n_tail, window) array.
+        n_full = 0
+        if n_samples >= window:
+            n_full = min(n_chunks, (n_samples - window) // step + 1)
+        if n_full:
+            windows = np.lib.stride_tricks.sliding_window_view(self.ndarray, window)
+            full_chunks = windows[::step][:n_full]
+        else:
+            full_chunks = np.empty((0, window), dtype=self.ndarray.dtype)
+        tail_chunks = np.zeros((n_chunks - n_full, window), dtype=self.ndarray.dtype)
+        for row, start in enumerate(range(n_full * step, n_chunks * step, step)):
+            split = self.ndarray[start : start + window]
+            tail_chunks[row, : len(split)] = split
+
+        # The analyzers batch over these blocks. chunks lists every chunk as a
+        # row of them, without copying.
+        self.chunk_blocks = (full_chunks, tail_chunks)
+        self.chunks = [*full_chunks, *tail_chunks]
+        self._chunk_rate = rate
 
         if verbose:
             print("read_audio_data: complete, read ", str(len(self.chunks)), "chunks.")
@@ -177,93 +269,158 @@ class RecordingBase:
         # Returns ndarray trimmed for start_sec:end_sec
         return self.ndarray[start_sec * SAMPLE_RATE : end_sec * SAMPLE_RATE]
 
-    def extract_detections_as_audio(
-        self,
-        directory,
-        padding_secs=0,
-        format="flac",
-        bitrate="192k",
-        min_conf=0.0,
-    ):
-        self.extracted_audio_paths = {}  # Clear paths before extraction.
-        for detection in self.detections:
+    def _extraction_ranges(self, padding_secs, min_conf):
+        # Maps the (start_time, end_time) extraction key of every detection to
+        # extract to its padded (start_sec, end_sec) range.
+        ranges = {}
+        for detection, _ in self._qualify_detections():
             # Skip if detection is under min_conf parameter.
             # Useful for reducing the number of extracted detections.
-            if detection["confidence"] < min_conf:
+            if detection.confidence < min_conf:
                 continue
 
             start_sec = int(
-                detection["start_time"] - padding_secs
-                if detection["start_time"] > padding_secs
+                detection.start_time - padding_secs
+                if detection.start_time > padding_secs
                 else 0
             )
             end_sec = int(
-                detection["end_time"] + padding_secs
-                if detection["end_time"] + padding_secs < self.duration
+                detection.end_time + padding_secs
+                if detection.end_time + padding_secs < self.duration
                 else self.duration
             )
+            ranges[(detection.start_time, detection.end_time)] = (start_sec, end_sec)
+        return ranges
+
+    def _extract_in_parallel(self, extract, ranges):
+        # Extracts are independent and spend most of their time encoding in C, which
+        # releases the GIL, so run them on a thread pool. Each range is written once
+        # even when several detections share it. Returns extraction key -> path.
+        unique_ranges = sorted(set(ranges.values()))
+        with ThreadPoolExecutor() as executor:
+            paths = dict(
+                zip(unique_ranges, executor.map(lambda r: extract(*r), unique_ranges))
+            )
+        return {key: paths[r] for key, r in ranges.items()}
 
-            extract_array = self.get_extract_array(start_sec, end_sec)
+    def extract_detections_as_audio(
+        self,
+        directory,
+        padding_secs=0,
+        format="flac",
+        bitrate="192k",
+        min_conf=0.0,
+    ):
+        self.extracted_audio_paths = {}  # Clear paths before extraction.
+        ranges = self._extraction_ranges(padding_secs, min_conf)
+        # Per worker thread int16 scratch buffer for mp3 export, reused across clips.
+        buffers = threading.local()
+        self.extracted_audio_paths = self._extract_in_parallel(
+            partial(self._save_audio_extract, buffers, directory, format, bitrate),
+            ranges,
+        )
+
+    def _save_audio_extract(
+        self, buffers, directory, format, bitrate, start_sec, end_sec
+    ):
+        extract_array = self.get_extract_array(start_sec, end_sec)
+
+        if format == "mp3":
+            # Imported on first use; pydub is only needed for mp3 extracts.
+            import pydub
 
+            path = f"{directory}/{self.filestem}_{start_sec}s-{end_sec}s.mp3"
             channels = 1
-            data = np.int16(extract_array * 2**15)  # Normalized to -1, 1
+            # Normalized to -1, 1. Scaling by 32767 (as libsndfile does for wav and
+            # flac) keeps a full-scale 1.0 from wrapping around. The scaled samples
+            # are cast straight into the scratch buffer, without a float temporary.
+            n_samples = len(extract_array)
+            if (
+                getattr(buffers, "int16", None) is None
+                or len(buffers.int16) < n_samples
+            ):
+                buffers.int16 = np.empty(
+                    max(n_samples, int(self.sample_secs * SAMPLE_RATE * 2)),
+                    dtype=np.int16,
+                )
+            data = buffers.int16[:n_samples]
+            np.multiply(extract_array, np.float32(32767), out=data, casting="unsafe")
             audio = pydub.AudioSegment(
                 data.tobytes(),
                 frame_rate=SAMPLE_RATE,
                 sample_width=2,
                 channels=channels,
             )
-            if format == "mp3":
-                path = f"{directory}/{self.filestem}_{start_sec}s-{end_sec}s.mp3"
-                audio.export(path, format="mp3", bitrate=bitrate)
-            elif format == "wav":
+            audio.export(path, format="mp3", bitrate=bitrate)
+        else:
+            # wav and flac (default) are written as 16-bit PCM with libsndfile,
+            # rather than starting an ffmpeg process for every detection.
+            if format == "wav":
                 path = f"{directory}/{self.filestem}_{start_sec}s-{end_sec}s.wav"
-                audio.export(path, format="wav")
             else:
-                # flac is default.
                 path = f"{directory}/{self.filestem}_{start_sec}s-{end_sec}s.flac"
-                audio.export(path, format="flac")
-
-            # Save path for detections list.
-            extraction_key = f"{detection['start_time']}_{detection['end_time']}"
-            self.extracted_audio_paths[extraction_key] = path
+            sf.write(
+                path,
+                extract_array,
+                SAMPLE_RATE,
+                format="WAV" if format == "wav" else "FLAC",
+                subtype="PCM_16",
+            )
+        return path
 
     def extract_detections_as_spectrogram(
         self, directory, padding_secs=0, min_conf=0.0, top=14000, format="jpg", dpi=144
     ):
         self.extracted_spectrogram_paths = {}  # Clear paths before extraction.
-        for detection in self.detections:
-            # Skip if detection is under min_conf parameter.
-            # Useful for reducing the number of extracted detections.
-            if detection["confidence"] < min_conf:
-                continue
-
-            start_sec = int(
-                detection["start_time"] - padding_secs
-                if detection["start_time"] > padding_secs
-                else 0
-            )
-            end_sec = int(
-                detection["end_time"] + padding_secs
-                if detection["end_time"] + padding_secs < self.duration
-                else self.duration
-            )
-
-            extract_array = self.get_extract_array(start_sec, end_sec)
-
-            path = f"{directory}/{self.filestem}_{start_sec}s-{end_sec}s.{format}"
-            plt.specgram(extract_array, Fs=SAMPLE_RATE)
-            plt.ylim(top=top)
-            plt.ylabel("frequency kHz")
-            plt.title(f"{self.filename} ({start_sec}s - {end_sec}s)", fontsize=10)
-            plt.savefig(path, dpi=dpi)
-            plt.close()
+        ranges = self._extraction_ranges(padding_secs, min_conf)
+        # Matplotlib figures must not be shared between threads, so each worker
+        # thread draws into its own, reusing it for every spectrogram it saves.
+        figures = threading.local()
+        self.extracted_spectrogram_paths = self._extract_in_parallel(
+            partial(self._save_spectrogram, figures, directory, top, format, dpi),
+            ranges,
+        )
 
-            # Save path for detections list.
-            extraction_spectrogram_key = (
-                f"{detection['start_time']}_{detection['end_time']}"
-            )
-            self.extracted_spectrogram_paths[extraction_spectrogram_key] = path
+    def _save_spectrogram(
+        self, figures, directory, top, format, dpi, start_sec, end_sec
+    ):
+        # Imported on first use, as they're slow to import and only needed here.
+        # Figure is drawn with Agg on savefig, without pyplot or a GUI backend.
+        from matplotlib.figure import Figure
+        from scipy import signal
+
+        if not hasattr(figures, "ax"):
+            figures.ax = Figure().add_subplot()
+        ax = figures.ax
+        nfft = 256
+        noverlap = 128
+
+        extract_array = self.get_extract_array(start_sec, end_sec)
+
+        path = f"{directory}/{self.filestem}_{start_sec}s-{end_sec}s.{format}"
+        # Same parameters and dB scaling as matplotlib's specgram.
+        freqs, times, spec = signal.spectrogram(
+            extract_array,
+            fs=SAMPLE_RATE,
+            window=np.hanning(nfft),
+            noverlap=noverlap,
+            detrend=False,
+        )
+        with np.errstate(divide="ignore"):
+            spec_db = 10 * np.log10(spec)
+        pad = (nfft - noverlap) / SAMPLE_RATE / 2
+        ax.clear()
+        ax.imshow(
+            spec_db,
+            origin="lower",
+            aspect="auto",
+            extent=(times[0] - pad, times[-1] + pad, freqs[0], freqs[-1]),
+        )
+        ax.set_ylim(top=top)
+        ax.set_ylabel("frequency kHz")
+        ax.set_title(f"{self.filename} ({start_sec}s - {end_sec}s)", fontsize=10)
+        ax.figure.savefig(path, dpi=dpi)
+        return path
 
 
 class Recording(RecordingBase):
@@ -304,10 +461,9 @@ class Recording(RecordingBase):
             print("read_audio_data")
         # Open file with librosa (uses ffmpeg or libav)
         try:
-            self.ndarray, rate = librosa.load(
-                self.path, sr=SAMPLE_RATE, mono=True, res_type="kaiser_fast"
-            )
-            self.duration = librosa.get_duration(y=self.ndarray, sr=SAMPLE_RATE)
+            self.ndarray = _decode_audio(self.path)
+            rate = SAMPLE_RATE
+            self.duration = len(self.ndarray) / SAMPLE_RATE
         except audioread.exceptions.NoBackendError as e:
             print(e)
             raise AudioFormatError("Audio format could not be opened.")
@@ -355,7 +511,13 @@ class RecordingBuffer(RecordingBase):
         return "buffer"
 
     def read_audio_data(self):
-        self.ndarray = self.buffer
+        # Convert the buffer to contiguous float32 once, here. Integer PCM (as read
+        # by wavutils) is scaled to [-1, 1) like audio decoded from a file.
+        buffer = np.asarray(self.buffer)
+        if buffer.dtype == np.int16:
+            self.ndarray = np.divide(buffer, np.float32(32768), dtype=np.float32)
+        else:
+            self.ndarray = np.ascontiguousarray(buffer, dtype=np.float32)
         self.duration = len(self.ndarray) / self.rate
         self.process_audio_data(self.rate)
 
@@ -396,10 +558,9 @@ class RecordingFileObject(RecordingBase):
             print("read_audio_data")
         # Open file with librosa
         try:
-            self.ndarray, rate = librosa.load(
-                self.file_obj, sr=SAMPLE_RATE, mono=True, res_type="kaiser_fast"
-            )
-            self.duration = librosa.get_duration(y=self.ndarray, sr=SAMPLE_RATE)
+            self.ndarray = _decode_audio(self.file_obj)
+            rate = SAMPLE_RATE
+            self.duration = len(self.ndarray) / SAMPLE_RATE
         except audioread.exceptions.NoBackendError as e:
             print(e)
             raise AudioFormatError("Audio format could not be opened.")
@@ -459,16 +620,11 @@ class LargeRecording(Recording):
         # Set the file duration (does not read full audio into memory)
         # NOTE: This is the first opportunity for LR to read the file, so check for errors.
         try:
-            self.duration = librosa.get_duration(filename=self.path)
-        except audioread.exceptions.NoBackendError as e:
-            print(e)
-            raise AudioFormatError("Audio format could not be opened.")
-        except FileNotFoundError as e:
-            print(e)
-            raise e
-        except BaseException as e:
-            print(e)
-            raise AudioFormatError("Generic audio read error occurred from librosa.")
+            # Read the duration from the file header.
+            info = sf.info(self.path)
+            self.duration = info.frames / info.samplerate
+        except RuntimeError:
+            self.duration = self._get_duration_from_librosa()
 
         # TODO: overlay is currently incompatible with LargeRecording. Implement this feature.
 
@@ -478,14 +634,44 @@ class LargeRecording(Recording):
 
     def extract_embeddings(self):
         self.analyzer.extract_embeddings_for_recording(self)
-        self.embeddings_list = self.analyzer.embeddings
-        self.embeddings_extracted = True
+        self._store_embeddings()
+
+    def _get_duration_from_librosa(self):
+        # Formats libsndfile can't read; this may decode the whole file.
+        try:
+            return librosa.get_duration(filename=self.path)
+        except audioread.exceptions.NoBackendError as e:
+            print(e)
+            raise AudioFormatError("Audio format could not be opened.")
+        except FileNotFoundError as e:
+            print(e)
+            raise e
+        except BaseException as e:
+            print(e)
+            raise AudioFormatError("Generic audio read error occurred from librosa.")
 
     def get_extract_array(self, start_sec, end_sec, verbose=False):
         # Returns ndarray trimmed for start_sec:end_sec
         if verbose:
             print(start_sec, end_sec)
         sr = SAMPLE_RATE
+
+        # Seek straight to the extract rather than decoding the file again for every
+        # detection. Files libsndfile can't read, or that need resampling, fall back
+        # to librosa.
+        try:
+            with sf.SoundFile(self.path) as audio_file:
+                if audio_file.samplerate == sr:
+                    audio_file.seek(int(start_sec * sr))
+                    audio_chunk = audio_file.read(
+                        frames=int((end_sec - start_sec) * sr),
+                        dtype="float32",
+                        always_2d=True,
+                    )
+                    return librosa.to_mono(audio_chunk.T)
+        except RuntimeError:
+            pass
+
         audio_chunk, _ = librosa.load(
             self.path,
             sr=sr,
@@ -554,10 +740,9 @@ class MultiProcessRecording(RecordingBase):
             print("read_audio_data")
         # Open file with librosa (uses ffmpeg or libav)
         try:
-            self.ndarray, rate = librosa.load(
-                self.path, sr=SAMPLE_RATE, mono=True, res_type="kaiser_fast"
-            )
-            self.duration = librosa.get_duration(y=self.ndarray, sr=SAMPLE_RATE)
+            self.ndarray = _decode_audio(self.path)
+            rate = SAMPLE_RATE
+            self.duration = len(self.ndarray) / SAMPLE_RATE
         except audioread.exceptions.NoBackendError as e:
             print(e)
             raise AudioFormatError("Audio format could not be opened.")
@@ -601,29 +786,29 @@ class MultiProcessRecording(RecordingBase):
 
 
 class Detection:
+    # One instance per detection, so skip the per-instance __dict__.
+    __slots__ = (
+        "data",
+        "start_time",
+        "end_time",
+        "result",
+        "scientific_name",
+        "common_name",
+        "confidence",
+    )
+
     def __init__(self, start_time, end_time, data):
         self.data = data or []
         self.start_time = start_time
         self.end_time = end_time
-
-    @property
-    def result(self):
-        return self.data[0][0]
-
-    @property
-    def confidence(self):
-        confidence = self.data[0][1]
-        if type(confidence) is np.float32:
-            return confidence.item()
-        return confidence
-
-    @property
-    def scientific_name(self):
-        return self.result.split("_")[0]
-
-    @property
-    def common_name(self):
-        return self.result.split("_")[1]
+        if self.data:
+            # Split the label and unwrap the confidence once, as_dict reads them often.
+            self.result, confidence = self.data[0][0], self.data[0][1]
+            parts = self.result.split("_")
+            self.scientific_name, self.common_name = parts[0], parts[1]
+            if type(confidence) is np.float32:
+                confidence = confidence.item()
+            self.confidence = confidence
 
     @property
     def as_dict(self):
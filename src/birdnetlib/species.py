@@ -122,10 +122,8 @@ class SpeciesList:
 
     def load_labels(self, verbose=False):
         labels_file_path = LABEL_PATH
-        labels = []
         with open(labels_file_path, "r") as lfile:
-            for line in lfile.readlines():
-                labels.append(line.replace("\n", ""))
+            labels = lfile.read().splitlines()
         self.labels = labels
         if verbose:
             print("Labels loaded.")
@@ -1,6 +1,8 @@
 import calendar
 import math
+import os
 import librosa
+import requests
 
 
 def return_week_48_from_datetime(dt):
@@ -10,6 +12,25 @@ def return_week_48_from_datetime(dt):
     return week_48
 
 
+def download_file(url, path, chunk_size=1 << 20, timeout=60):
+    # Stream to a temporary file so large models are never held in memory
+    # and an interrupted download doesn't leave a partial file at `path`.
+    # timeout (seconds) applies to connecting and to each read, so a stalled
+    # server raises instead of hanging.
+    tmp_path = f"{path}.tmp"
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        try:
+            with open(tmp_path, "wb") as file:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    file.write(chunk)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
 def read_audio_segments(
     file_path, chunk_duration=60 * 10, segment_duration=3, sr=48000
 ):
@@ -1,12 +1,23 @@
-from birdnetlib import Recording
-from birdnetlib.analyzer import Analyzer, AnalyzerConfigurationError
-
+from birdnetlib import Recording, RecordingBuffer
+from birdnetlib.analyzer import (
+    MODEL_PATH,
+    Analyzer,
+    AnalyzerConfigurationError,
+    _InterpreterPool,
+)
+
+import birdnetlib.wavutils as wavutils
 from pprint import pprint
 import pytest
 import os
 import tempfile
 import csv
 from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import librosa
+import numpy as np
+import sys
 
 
 def test_without_species_list():
@@ -303,6 +314,176 @@ def test_custom_trained_analyzer():
     assert str(exc_info.value) == expected_message
 
 
+def test_model_precision():
+    with pytest.raises(AnalyzerConfigurationError) as exc_info:
+        analyzer = Analyzer(precision="int4")
+    assert str(exc_info.value) == "precision must be one of fp32, fp16, int8"
+
+    # The bundled FP32 model is used when requested explicitly.
+    analyzer = Analyzer(precision="fp32")
+    assert analyzer.precision == "fp32"
+    assert analyzer.model_download_was_required is False
+
+
+def test_output_quantization():
+    # The FP32 model's outputs are used as is; integer outputs are dequantized.
+    analyzer = Analyzer(precision="fp32")
+    assert analyzer._output_quantization is None
+    assert analyzer._embedding_quantization is None
+    dequantized = analyzer._dequantize(np.array([[3, 5]], dtype=np.int8), (0.5, 3))
+    assert dequantized.dtype == np.float32
+    np.testing.assert_array_equal(dequantized, [[0.0, 1.0]])
+
+
+def test_preloaded_interpreter_is_shared():
+    Analyzer.preload()
+    analyzer = Analyzer()
+    other_analyzer = Analyzer(batch_size=2)
+    assert analyzer.interpreter is other_analyzer.interpreter
+
+    # Each analyzer resizes the shared input tensor as needed.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    recording = Recording(analyzer, input_path, min_conf=0.25)
+    recording.analyze()
+    other_recording = Recording(other_analyzer, input_path, min_conf=0.25)
+    other_recording.analyze()
+    assert len(recording.detections) > 0
+    assert [(d["label"], round(d["confidence"], 4)) for d in recording.detections] == [
+        (d["label"], round(d["confidence"], 4)) for d in other_recording.detections
+    ]
+
+
+def test_concurrent_predict():
+    # Threads sharing one Analyzer each get their own interpreter from the pool.
+    analyzer = Analyzer(num_threads=1)
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    recording = Recording(analyzer, input_path)
+    recording.read_audio_data()
+    chunks = recording.chunks[:8]
+
+    expected = [analyzer.predict(chunk) for chunk in chunks]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(analyzer.predict, chunks))
+
+    for result, prediction in zip(results, expected):
+        np.testing.assert_allclose(result, prediction, atol=1e-5)
+
+
+def test_interpreter_pool_recovers_from_failed_interpreter():
+    pool = _InterpreterPool(MODEL_PATH, 1, max_size=2)
+    with pool.acquire():
+        with patch.object(pool, "_new_interpreter", side_effect=RuntimeError):
+            with pytest.raises(RuntimeError):
+                with pool.acquire():
+                    pass
+        # The failed interpreter's slot is free again.
+        with pool.acquire() as state:
+            assert state["interpreter"] is not pool.interpreter
+
+
+def _predict_in_child(analyzer, sample, results):
+    results.put(analyzer.predict(sample))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_analyzer_created_before_fork():
+    # A forked child builds its own interpreters instead of using the parent's.
+    analyzer = Analyzer()
+    sample = np.random.default_rng(0).uniform(-0.5, 0.5, 144000).astype(np.float32)
+    expected = analyzer.predict(sample)
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(
+        target=_predict_in_child, args=(analyzer, sample, results)
+    )
+    process.start()
+    result = results.get(timeout=120)
+    process.join()
+    assert process.exitcode == 0
+    np.testing.assert_allclose(result, expected, atol=1e-5)
+
+
+def test_detections_follow_recording_settings():
+    # Filtered detections are cached, but must follow changes to the settings.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    recording = Recording(Analyzer(), input_path, min_conf=0.25)
+    recording.analyze()
+    detections = recording.detections
+    assert recording.detections == detections
+
+    recording.minimum_confidence = 0.5
+    assert 0 < len(recording.detections) < len(detections)
+    assert all(d["confidence"] > 0.5 for d in recording.detections)
+
+    # Detection dicts are rebuilt on every access, so callers may modify them.
+    del recording.detections[0]["confidence"]
+    assert "confidence" in recording.detections[0]
+
+
+def test_detections_follow_in_place_changes():
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    analyzer = Analyzer(custom_species_list=["Cardinalis cardinalis_Northern Cardinal"])
+    recording = Recording(analyzer, input_path, min_conf=0.25)
+    recording.analyze()
+    n_detections = len(recording.detections)
+
+    analyzer.custom_species_list.append("Haemorhous mexicanus_House Finch")
+    house_finches = [
+        d for d in recording.detections if d["common_name"] == "House Finch"
+    ]
+    assert len(house_finches) > 0
+    assert len(recording.detections) == n_detections + len(house_finches)
+
+    recording.detection_list[:] = [
+        d for d in recording.detection_list if d.common_name != "House Finch"
+    ]
+    assert len(recording.detections) == n_detections
+
+
+@pytest.mark.parametrize("filename", ["small_32k.wav", "small_32k.flac"])
+def test_resampled_recording(filename):
+    # 32 kHz files are resampled to the 48 kHz the model expects.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files", filename)
+    recording = Recording(Analyzer(), input_path)
+    recording.read_audio_data()
+    assert recording.ndarray.dtype == np.float32
+    assert recording.ndarray.flags.writeable
+    assert len(recording.ndarray) == 8604738 * 48000 // 32000
+    assert recording.duration == pytest.approx(8604738 / 32000)
+
+
+def test_resample_without_soxr():
+    # soxr is optional; without it, audio is resampled with librosa.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/small_32k.wav")
+    resampled = np.zeros(10, dtype=np.float32)
+    librosa.resample  # Load it first, newer librosa versions import soxr themselves.
+    with patch.dict(sys.modules, {"soxr": None}):
+        with patch("librosa.resample", return_value=resampled) as resample:
+            recording = Recording(Analyzer(), input_path)
+            recording.read_audio_data()
+    assert recording.ndarray is resampled
+    assert resample.call_args.kwargs["orig_sr"] == 32000
+    assert resample.call_args.kwargs["target_sr"] == 48000
+
+
+def test_int16_buffer_matches_file():
+    # int16 PCM buffers are scaled like decoded audio, so detections match the file.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    analyzer = Analyzer()
+    recording = Recording(analyzer, input_path, min_conf=0.25)
+    recording.analyze()
+
+    with open(input_path, "rb") as f:
+        rate, buffer = next(wavutils.bufferwavs(f))
+    assert buffer.dtype == np.int16
+    buffer_recording = RecordingBuffer(analyzer, buffer, rate, min_conf=0.25)
+    buffer_recording.analyze()
+    assert buffer_recording.ndarray.dtype == np.float32
+    assert len(buffer_recording.detections) > 0
+    assert buffer_recording.detections == recording.detections
+
+
 def test_species_list_calls():
     lon = -120.7463
     lat = 35.4244
@@ -0,0 +1,67 @@
+from birdnetlib import Recording, LargeRecording
+from birdnetlib.analyzer import Analyzer, LargeRecordingAnalyzer
+
+import numpy as np
+import pytest
+import os
+import soundfile as sf
+
+
+def _detection_tuples(recording):
+    return [
+        (d["start_time"], d["end_time"], d["label"], round(d["confidence"], 4))
+        for d in recording.detections
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [3, 8, 64])
+def test_batched_analyzer_matches_single_chunk(batch_size):
+    # Batched inference should return the same detections as one chunk per invocation.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+
+    single = Recording(Analyzer(batch_size=1), input_path, min_conf=0.25)
+    single.analyze()
+
+    batched = Recording(Analyzer(batch_size=batch_size), input_path, min_conf=0.25)
+    batched.analyze()
+
+    assert len(batched.detections) > 0
+    assert _detection_tuples(batched) == _detection_tuples(single)
+
+
+def test_batched_large_analyzer_matches_single_chunk():
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+
+    single = LargeRecording(
+        LargeRecordingAnalyzer(batch_size=1), input_path, min_conf=0.25
+    )
+    single.analyze()
+
+    batched = LargeRecording(
+        LargeRecordingAnalyzer(batch_size=5), input_path, min_conf=0.25
+    )
+    batched.analyze()
+
+    assert len(batched.detections) > 0
+    assert _detection_tuples(batched) == _detection_tuples(single)
+
+
+def test_batches_spanning_padded_last_chunk():
+    # small_48k.wav is 268.9 s long: 89 full chunks and one zero-padded last chunk,
+    # which the 13th batch of 7 shares with the last full chunks.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/small_48k.wav")
+
+    single = Recording(Analyzer(batch_size=1), input_path, min_conf=0.25)
+    single.analyze()
+
+    batched = Recording(Analyzer(batch_size=7), input_path, min_conf=0.25)
+    batched.analyze()
+
+    # The decoded audio is kept as is, only the last chunk is copied to pad it.
+    assert len(batched.ndarray) == sf.info(input_path).frames
+    full_chunks, tail_chunks = batched.chunk_blocks
+    assert (len(full_chunks), len(tail_chunks)) == (89, 1)
+    assert np.shares_memory(full_chunks, batched.ndarray)
+
+    assert len(batched.detections) > 0
+    assert _detection_tuples(batched) == _detection_tuples(single)
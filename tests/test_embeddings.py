@@ -1,5 +1,6 @@
 from birdnetlib import Recording, LargeRecording
 from birdnetlib.analyzer import Analyzer, LargeRecordingAnalyzer
+import birdnetlib.main
 
 from pprint import pprint
 import pytest
@@ -126,3 +127,40 @@ def test_largefile_embeddings():
         assert np.allclose(
             i["embeddings"], recording.embeddings[idx]["embeddings"], atol=tolerance
         )
+
+
+def test_embeddings_array():
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    recording = Recording(Analyzer(batch_size=3), input_path)
+    recording.extract_embeddings()
+
+    assert recording.embeddings_array.shape == (40, 1024)
+    assert recording.embeddings_array.dtype == np.float32
+    assert recording.embedding_times[1].tolist() == [3.0, 6.0]
+
+    # The list of dicts is built from the same arrays.
+    assert len(recording.embeddings) == 40
+    assert recording.embeddings[1]["start_time"] == 3.0
+    assert np.allclose(
+        recording.embeddings[1]["embeddings"], recording.embeddings_array[1]
+    )
+
+
+def test_embeddings_after_analyze_reuse_audio():
+    # The audio decoded by analyze() is reused, not decoded again.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    analyzer = Analyzer()
+    recording = Recording(analyzer, input_path, overlap=1.0)
+    with patch(
+        "birdnetlib.main._decode_audio", wraps=birdnetlib.main._decode_audio
+    ) as decode_audio:
+        recording.analyze()
+        recording.overlap = 0.0
+        recording.extract_embeddings()
+    assert decode_audio.call_count == 1
+
+    # Chunks follow the overlap at the time of extraction.
+    expected = Recording(analyzer, input_path)
+    expected.extract_embeddings()
+    assert np.array_equal(recording.embedding_times, expected.embedding_times)
+    assert np.allclose(recording.embeddings_array, expected.embeddings_array)
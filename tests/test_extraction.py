@@ -5,6 +5,8 @@ from pprint import pprint
 import os
 import tempfile
 import pydub
+import soundfile
+import matplotlib.image
 import pytest
 
 
@@ -290,3 +292,43 @@ def test_extraction():
         }
 
         assert detection == expected_detection
+
+
+def test_pcm_extraction_without_ffmpeg():
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    recording = Recording(Analyzer(), input_path, min_conf=0.5)
+    recording.analyze()
+    assert len(recording.detections) > 0
+
+    # wav and flac are written with libsndfile as 16-bit PCM at 48000.
+    for format in ["wav", "flac"]:
+        with tempfile.TemporaryDirectory() as export_dir:
+            recording.extract_detections_as_audio(directory=export_dir, format=format)
+            files = os.listdir(export_dir)
+            assert len(files) == len(
+                {(d["start_time"], d["end_time"]) for d in recording.detections}
+            )
+            info = soundfile.info(f"{export_dir}/{files[0]}")
+            assert info.format == format.upper()
+            assert info.subtype == "PCM_16"
+            assert info.samplerate == 48000
+            assert info.duration == 3.0
+
+
+def test_spectrogram_extraction():
+    input_path = os.path.join(os.path.dirname(__file__), "test_files/soundscape.wav")
+    recording = Recording(Analyzer(), input_path, min_conf=0.5)
+    recording.analyze()
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        recording.extract_detections_as_spectrogram(directory=export_dir, format="png")
+        files = os.listdir(export_dir)
+        assert len(files) == len(
+            {(d["start_time"], d["end_time"]) for d in recording.detections}
+        )
+        for detection in recording.detections:
+            assert os.path.isfile(detection["extracted_spectrogram_path"])
+
+        # Default figure size at 144 dpi.
+        image = matplotlib.image.imread(f"{export_dir}/{files[0]}")
+        assert image.shape[:2] == (691, 921)
@@ -219,6 +219,25 @@ def test_large_extractions():
         assert files == expected_files
 
 
+@pytest.mark.parametrize("filename", ["soundscape.wav", "audio.mp3"])
+def test_extract_array_matches_librosa(filename):
+    # Extracts are read by seeking with soundfile; they should match librosa.load.
+    input_path = os.path.join(os.path.dirname(__file__), "test_files", filename)
+    recording = LargeRecording(LargeRecordingAnalyzer(), input_path)
+    for start_sec, end_sec in [(0, 3), (9, 16), (100, 107)]:
+        expected, _ = librosa.load(
+            input_path,
+            sr=48000,
+            mono=True,
+            offset=start_sec,
+            duration=end_sec - start_sec,
+            res_type="kaiser_fast",
+        )
+        extract = recording.get_extract_array(start_sec, end_sec)
+        assert extract.dtype == np.float32
+        assert np.array_equal(extract, expected)
+
+
 def test_exceptions():
     # LargeRecordingAnalyzer and LargeRecording have to be used in conjunction.
     # Test that exceptions are thrown if not used correctly.
@@ -1,6 +1,10 @@
 from birdnetlib.analyzer_lite import LiteAnalyzer, MODEL_PATH, LABEL_PATH
+from birdnetlib.utils import download_file
 import os
 import hashlib
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
 
 
 def test_downloading_models():
@@ -32,3 +36,20 @@ def test_downloading_models():
 
     os.rename(f"{MODEL_PATH}_temp", MODEL_PATH)
     os.rename(f"{LABEL_PATH}_temp", LABEL_PATH)
+
+
+def test_interrupted_download_leaves_no_partial_file(tmp_path):
+    def iter_content(chunk_size):
+        yield b"partial"
+        raise requests.ConnectionError("Connection reset")
+
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_content.side_effect = iter_content
+
+    path = tmp_path / "model.tflite"
+    with patch("birdnetlib.utils.requests.get", return_value=response) as get:
+        with pytest.raises(requests.ConnectionError):
+            download_file("https://example.com/model.tflite", path)
+    assert get.call_args.kwargs["timeout"]
+    assert list(tmp_path.iterdir()) == []
@@ -1,4 +1,4 @@
-from birdnetlib import Recording
+from birdnetlib import Recording, RecordingBuffer
 from birdnetlib.analyzer import Analyzer, MODEL_PATH, LABEL_PATH
 
 from pprint import pprint
@@ -6,6 +6,7 @@ import pytest
 import os
 import tempfile
 import csv
+import numpy as np
 
 
 def test_without_species_list():
@@ -72,3 +73,25 @@ def test_without_species_list():
 
     # Check that detection confidence is float.
     assert type(recording.detections[0]["confidence"]) is float
+
+
+def test_overlapping_chunks():
+    # 7 seconds with 1.5s overlap: chunks start at 0, 1.5, 3 and 4.5 seconds. The last
+    # one is zero-padded and the 1 second left after 6s is too short for a chunk.
+    rate = 48000
+    buffer = np.arange(7 * rate, dtype=np.float32)
+    recording = RecordingBuffer(None, buffer, rate, overlap=1.5)
+    recording.read_audio_data()
+
+    # Three full chunks are views of the signal, the padded one is a copy.
+    full_chunks, tail_chunks = recording.chunk_blocks
+    assert full_chunks.shape == (3, 3 * rate)
+    assert np.shares_memory(full_chunks, recording.ndarray)
+    assert tail_chunks.shape == (1, 3 * rate)
+
+    assert len(recording.chunks) == 4
+    assert [c[0] for c in recording.chunks] == [0, 1.5 * rate, 3 * rate, 4.5 * rate]
+    assert np.array_equal(
+        recording.chunks[3][: int(2.5 * rate)], buffer[int(4.5 * rate) :]
+    )
+    assert not recording.chunks[3][int(2.5 * rate) :].any()